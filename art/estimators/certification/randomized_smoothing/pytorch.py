@@ -108,11 +108,11 @@ class PyTorchRandomizedSmoothing(RandomizedSmoothingMixin, PyTorchClassifier):
         )
 
     def _predict_classifier(self, x: np.ndarray, batch_size: int) -> np.ndarray:
-        x = x.astype(ART_NUMPY_DTYPE)
+        x = x.astype(ART_NUMPY_DTYPE, copy=False)
         return PyTorchClassifier.predict(self, x=x, batch_size=batch_size)
 
     def _fit_classifier(self, x: np.ndarray, y: np.ndarray, batch_size: int, nb_epochs: int, **kwargs) -> None:
-        x = x.astype(ART_NUMPY_DTYPE)
+        x = x.astype(ART_NUMPY_DTYPE, copy=False)
         return PyTorchClassifier.fit(self, x, y, batch_size=batch_size, nb_epochs=nb_epochs, **kwargs)
 
     def fit(self, x, y, batch_size=128, nb_epochs=10, **kwargs):
@@ -133,7 +133,7 @@ class PyTorchRandomizedSmoothing(RandomizedSmoothingMixin, PyTorchClassifier):
         :type kwargs: `dict`
         :return: `None`
         """
-        RandomizedSmoothingMixin.fit(self, x, y, batch_size=128, nb_epochs=10, **kwargs)
+        RandomizedSmoothingMixin.fit(self, x, y, batch_size=batch_size, nb_epochs=nb_epochs, **kwargs)
 
     def predict(self, x, batch_size=128, **kwargs):
         """
@@ -148,7 +148,7 @@ class PyTorchRandomizedSmoothing(RandomizedSmoothingMixin, PyTorchClassifier):
         :return: Array of predictions of shape `(nb_inputs, nb_classes)`.
         :rtype: `np.ndarray`
         """
-        return RandomizedSmoothingMixin.predict(self, x, batch_size=128, **kwargs)
+        return RandomizedSmoothingMixin.predict(self, x, batch_size=batch_size, **kwargs)
 
     def loss_gradient(self, x: np.ndarray, y: np.ndarray, **kwargs) -> np.ndarray:
         """
@@ -28,7 +28,7 @@ import logging
 from typing import Optional, Tuple
 
 import numpy as np
-from scipy.stats import norm
+from scipy.special import betainc, betaincinv, ndtri
 from tqdm import tqdm
 
 from art.config import ART_NUMPY_DTYPE
@@ -57,6 +57,7 @@ class RandomizedSmoothingMixin(ABC):
         self.sample_size = sample_size
         self.scale = scale
         self.alpha = alpha
+        self._binomial_thresholds: Optional[Tuple[int, float, np.ndarray]] = None
 
     def _predict_classifier(self, x: np.ndarray, batch_size: int) -> np.ndarray:
         """
@@ -79,8 +80,6 @@ class RandomizedSmoothingMixin(ABC):
         :type is_abstain: `boolean`
         :return: Array of predictions of shape `(nb_inputs, nb_classes)`.
         """
-        from scipy.stats import binom_test
-
         is_abstain = kwargs.get("is_abstain")
         if is_abstain is not None and not isinstance(is_abstain, bool):
             raise ValueError("The argument is_abstain needs to be of type bool.")
@@ -88,26 +87,58 @@ class RandomizedSmoothingMixin(ABC):
             is_abstain = True
 
         logger.info("Applying randomized smoothing.")
-        n_abstained = 0
-        prediction = []
-        for x_i in tqdm(x, desc="Randomized smoothing"):
-            # get class counts
-            counts_pred = self._prediction_counts(x_i, batch_size=batch_size)
-            top = counts_pred.argsort()[::-1]
-            count1 = np.max(counts_pred)
-            count2 = counts_pred[top[1]]
-
-            # predict or abstain
-            smooth_prediction = np.zeros(counts_pred.shape)
-            if (not is_abstain) or (binom_test(count1, count1 + count2, p=0.5) <= self.alpha):
-                smooth_prediction[np.argmax(counts_pred)] = 1
-            elif is_abstain:
-                n_abstained += 1
-
-            prediction.append(smooth_prediction)
+        # get class counts for all inputs in a single batched pass
+        counts_pred = self._prediction_counts(x, batch_size=batch_size)
+
+        # predict or abstain
+        if is_abstain:
+            # only the two largest counts are needed, partitioning finds them in linear time
+            counts_top = np.partition(counts_pred, -2, axis=1)
+            count1 = counts_top[:, -1]
+            count2 = counts_top[:, -2]
+
+            # the binomial test reduces to a lookup of the smallest significant count1 for the total
+            is_accepted = count1 >= self._binomial_test_thresholds()[count1 + count2]
+        else:
+            is_accepted = np.ones(counts_pred.shape[0], dtype=bool)
+
+        prediction = np.zeros(counts_pred.shape, dtype=ART_NUMPY_DTYPE)
+        prediction[is_accepted, np.argmax(counts_pred[is_accepted], axis=1)] = 1
+
+        n_abstained = np.sum(~is_accepted)
         if n_abstained > 0:
-            logger.info("%s prediction(s) abstained." % n_abstained)
-        return np.array(prediction)
+            logger.info("%d prediction(s) abstained.", n_abstained)
+        return prediction
+
+    def _binomial_test_thresholds(self) -> np.ndarray:
+        """
+        Computes, for every total `m` of the two largest class counts up to `sample_size`, the smallest count `k` of the
+        top class for which the two-sided binomial test of `k` successes in `m` trials against p=0.5 is significant at
+        level `alpha`. The thresholds are cached for the current `sample_size` and `alpha`.
+
+        :return: Array of thresholds of shape `(sample_size + 1,)`, with a threshold of `m + 1` if no `k` is
+                 significant.
+        """
+        if self._binomial_thresholds is not None:
+            sample_size, alpha, thresholds = self._binomial_thresholds
+            if sample_size == self.sample_size and alpha == self.alpha:
+                return thresholds
+
+        # the p-value min(1, 2 * P(X >= k)) for X ~ Bin(m, 0.5) is given by the regularized incomplete beta function and
+        # decreases in k, so the threshold of every total is found by a vectorized binary search over k
+        total = np.arange(self.sample_size + 1)
+        low = np.ones_like(total)
+        high = total + 1
+        while np.any(low < high):
+            is_searching = low < high
+            mid = (low + high) // 2
+            is_significant = 2 * betainc(mid, np.maximum(total - mid + 1, 1), 0.5) <= self.alpha
+            high = np.where(is_searching & is_significant, mid, high)
+            low = np.where(is_searching & ~is_significant, mid + 1, low)
+
+        self._binomial_thresholds = (self.sample_size, self.alpha, low)
+
+        return low
 
     def _fit_classifier(self, x: np.ndarray, y: np.ndarray, batch_size: int, nb_epochs: int, **kwargs) -> None:
         """
@@ -148,80 +179,116 @@ class RandomizedSmoothingMixin(ABC):
         :param batch_size: Batch size.
         :return: Tuple of length 2 of the selected class and certified radius.
         """
-        prediction = []
-        radius = []
-
-        for x_i in x:
-
-            # get sample prediction for classification
-            counts_pred = self._prediction_counts(x_i, n=self.sample_size, batch_size=batch_size)
-            class_select = np.argmax(counts_pred)
+        # get sample predictions for classification and certification in a single pass, the first `sample_size`
+        # samples of each input select the class and the remaining `n` samples estimate its probability
+        labels, nb_classes = self._prediction_labels(x, n=self.sample_size + n, batch_size=batch_size)
+        counts_pred = self._class_counts(labels[:, : self.sample_size], nb_classes)
+        counts_est = self._class_counts(labels[:, self.sample_size :], nb_classes)
 
-            # get sample prediction for certification
-            counts_est = self._prediction_counts(x_i, n=n, batch_size=batch_size)
-            count_class = counts_est[class_select]
+        class_select = np.argmax(counts_pred, axis=1)
+        count_class = counts_est[np.arange(x.shape[0]), class_select]
 
-            prob_class = self._lower_confidence_bound(count_class, n)
+        prob_class = self._lower_confidence_bound(count_class, n)
 
-            if prob_class < 0.5:
-                prediction.append(-1)
-                radius.append(0.0)
-            else:
-                prediction.append(class_select)
-                radius.append(self.scale * norm.ppf(prob_class))
+        is_certified = prob_class >= 0.5
+        prediction = np.where(is_certified, class_select, -1)
+        radius = np.where(is_certified, self.scale * ndtri(prob_class), 0.0)
 
-        return np.array(prediction), np.array(radius)
+        return prediction, radius
 
     def _noisy_samples(self, x: np.ndarray, n: Optional[int] = None) -> np.ndarray:
         """
         Adds Gaussian noise to `x` to generate samples. Optionally augments `y` similarly.
 
-        :param x: Sample input with shape as expected by the model.
-        :param n: Number of noisy samples to create.
-        :return: Array of samples of the same shape as `x`.
+        :param x: Batch of inputs with shape as expected by the model.
+        :param n: Number of noisy samples to create per input.
+        :return: Array of samples of shape `(nb_inputs * n, ...)`, ordered such that the `n` samples of each input are
+                 contiguous.
         """
         # set default value to sample_size
         if n is None:
             n = self.sample_size
 
-        # augment x
-        x = np.expand_dims(x, axis=0)
-        x = np.repeat(x, n, axis=0)
-        x = x + np.random.normal(scale=self.scale, size=x.shape).astype(ART_NUMPY_DTYPE)
+        # augment x, the inputs are broadcast over the samples and added to the noise in a single pass that produces
+        # ART_NUMPY_DTYPE directly, avoiding repeated copies of x and a separate conversion of the noise
+        shape = (x.shape[0], n) + x.shape[1:]
+        x_noisy = np.add(np.random.normal(scale=self.scale, size=shape), x[:, np.newaxis], dtype=ART_NUMPY_DTYPE)
 
-        return x
+        return x_noisy.reshape((x.shape[0] * n,) + x.shape[1:])
 
-    def _prediction_counts(self, x: np.ndarray, n: Optional[int] = None, batch_size: int = 128) -> np.ndarray:
+    def _prediction_labels(
+        self, x: np.ndarray, n: Optional[int] = None, batch_size: int = 128
+    ) -> Tuple[np.ndarray, int]:
         """
-        Makes predictions and then converts probability distribution to counts.
+        Makes predictions on noisy samples and converts the probability distributions to class labels.
 
-        :param x: Sample input with shape as expected by the model.
-        :param n: Number of noisy samples to create.
+        :param x: Batch of inputs with shape as expected by the model.
+        :param n: Number of noisy samples to create per input.
         :param batch_size: Size of batches.
-        :return: Array of counts with length equal to number of columns of `x`.
+        :return: Tuple of the array of predicted class labels of shape `(nb_inputs, n)` and the number of classes
+                 predicted by the classifier.
+        """
+        # set default value to sample_size
+        if n is None:
+            n = self.sample_size
+
+        # without noise all samples of an input are identical and share the prediction of the input itself
+        if self.scale == 0.0:
+            predictions = self._predict_classifier(x=x.astype(ART_NUMPY_DTYPE), batch_size=batch_size)
+            return np.repeat(np.argmax(predictions, axis=-1)[:, np.newaxis], n, axis=1), predictions.shape[-1]
+
+        # sample, predict and label the noisy samples of all inputs in chunks of batch_size, so that only one batch of
+        # noisy samples is held in memory at a time
+        labels = np.empty((x.shape[0] * n,), dtype=np.int64)
+        nb_classes = 0
+        for begin in tqdm(range(0, labels.shape[0], batch_size), desc="Randomized smoothing"):
+            end = min(begin + batch_size, labels.shape[0])
+            x_new = self._noisy_samples(x[np.arange(begin, end) // n], n=1)
+            predictions = self._predict_classifier(x=x_new, batch_size=batch_size)
+            labels[begin:end] = np.argmax(predictions, axis=-1)
+            nb_classes = predictions.shape[-1]
+
+        return labels.reshape((x.shape[0], n)), nb_classes
+
+    @staticmethod
+    def _class_counts(labels: np.ndarray, nb_classes: int) -> np.ndarray:
+        """
+        Converts class labels of noisy samples to class counts.
+
+        :param labels: Array of predicted class labels of shape `(nb_inputs, n)`.
+        :param nb_classes: Number of classes predicted by the classifier.
+        :return: Array of counts of shape `(nb_inputs, nb_classes)`.
         """
-        # sample and predict
-        x_new = self._noisy_samples(x, n=n)
-        predictions = self._predict_classifier(x=x_new, batch_size=batch_size)
+        nb_inputs = labels.shape[0]
 
-        # convert to binary predictions
-        idx = np.argmax(predictions, axis=-1)
-        pred = np.zeros(predictions.shape)
-        pred[np.arange(pred.shape[0]), idx] = 1
+        # get class counts per input with a single histogram over labels offset into a separate range per input
+        offsets = np.arange(nb_inputs)[:, np.newaxis] * nb_classes
+        counts = np.bincount((labels + offsets).ravel(), minlength=nb_inputs * nb_classes)
 
-        # get class counts
-        counts = np.sum(pred, axis=0)
+        return counts.reshape((nb_inputs, nb_classes))
 
-        return counts
+    def _prediction_counts(self, x: np.ndarray, n: Optional[int] = None, batch_size: int = 128) -> np.ndarray:
+        """
+        Makes predictions and then converts probability distribution to counts.
+
+        :param x: Batch of inputs with shape as expected by the model.
+        :param n: Number of noisy samples to create per input.
+        :param batch_size: Size of batches.
+        :return: Array of counts of shape `(nb_inputs, nb_classes)`.
+        """
+        labels, nb_classes = self._prediction_labels(x, n=n, batch_size=batch_size)
+        return self._class_counts(labels, nb_classes)
 
-    def _lower_confidence_bound(self, n_class_samples: int, n_total_samples: int) -> float:
+    def _lower_confidence_bound(self, n_class_samples: np.ndarray, n_total_samples: int) -> np.ndarray:
         """
         Uses Clopper-Pearson method to return a (1-alpha) lower confidence bound on bernoulli proportion
 
-        :param n_class_samples: Number of samples of a specific class.
+        :param n_class_samples: Number of samples of a specific class for each input.
         :param n_total_samples: Number of samples for certification.
-        :return: Lower bound on the binomial proportion w.p. (1-alpha) over samples.
+        :return: Lower bounds on the binomial proportion w.p. (1-alpha) over samples for each input.
         """
-        from statsmodels.stats.proportion import proportion_confint
+        # the lower bound is the alpha quantile of Beta(k, n - k + 1), which is defined as 0 for k = 0
+        n_class_samples = np.asarray(n_class_samples)
+        lower_bound = betaincinv(np.maximum(n_class_samples, 1), n_total_samples - n_class_samples + 1, self.alpha)
 
-        return proportion_confint(n_class_samples, n_total_samples, alpha=2 * self.alpha, method="beta")[0]
+        return np.where(n_class_samples > 0, lower_bound, 0.0)
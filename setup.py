@@ -15,7 +15,6 @@ install_requires = [
     "setuptools",
     "Pillow",
     "tqdm",
-    "statsmodels",
     "pydub",
     "resampy",
     "ffmpeg-python",
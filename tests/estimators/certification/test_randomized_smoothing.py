@@ -165,6 +165,60 @@ class TestRandomizedSmoothingVectors(unittest.TestCase):
         self.assertTrue((radius <= 1).all())
         self.assertTrue((pred < y_test.shape[1]).all())
 
+    def test_iris_without_noise(self):
+        (_, _), (x_test, _) = self.iris
+
+        ptc = get_tabular_classifier_pt()
+        rs = PyTorchRandomizedSmoothing(
+            model=ptc.model,
+            loss=ptc._loss,
+            input_shape=ptc.input_shape,
+            nb_classes=ptc.nb_classes,
+            channels_first=ptc.channels_first,
+            clip_values=ptc.clip_values,
+            sample_size=100,
+            scale=0.0,
+            alpha=0.001,
+        )
+        y_test_base = np.argmax(ptc.predict(x_test), axis=1)
+
+        # check predict returns the one-hot prediction of the base classifier for every input
+        y_test_smooth = rs.predict(x=x_test)
+        np.testing.assert_array_equal(y_test_smooth, np.eye(ptc.nb_classes)[y_test_base])
+
+        # check certification selects the class of the base classifier with a radius of zero
+        pred, radius = rs.certify(x=x_test, n=250)
+        np.testing.assert_array_equal(pred, y_test_base)
+        np.testing.assert_array_equal(radius, np.zeros(len(x_test)))
+
+    def test_binomial_test_thresholds(self):
+        from scipy.stats import binom_test
+
+        ptc = get_tabular_classifier_pt()
+        rs = PyTorchRandomizedSmoothing(
+            model=ptc.model,
+            loss=ptc._loss,
+            input_shape=ptc.input_shape,
+            nb_classes=ptc.nb_classes,
+            channels_first=ptc.channels_first,
+            clip_values=ptc.clip_values,
+            sample_size=100,
+            scale=0.01,
+            alpha=0.001,
+        )
+
+        # check thresholds agree with the two-sided binomial test for every count of the top two classes
+        thresholds = rs._binomial_test_thresholds()
+        self.assertEqual(thresholds.shape, (101,))
+        for total in range(1, 101):
+            for count1 in range((total + 1) // 2, total + 1):
+                is_significant = binom_test(count1, total, p=0.5) <= rs.alpha
+                self.assertEqual(count1 >= thresholds[total], is_significant)
+
+        # check thresholds are recomputed when alpha changes
+        rs.alpha = 0.05
+        self.assertTrue((rs._binomial_test_thresholds() <= thresholds).all())
+
 
 if __name__ == "__main__":
     unittest.main()